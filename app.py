@@ -2,11 +2,22 @@
 # Combina: app, KPIs, Graphics, Informacion, Map_loader y estilos en un solo archivo.
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 import folium
 import json
 import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+import pyarrow as pa
+import pyarrow.ipc
+
+try:
+    import fcntl  # bloqueo entre procesos (solo POSIX)
+except ImportError:
+    fcntl = None
 
 # ---------------------------------------------------------------------
 # Configuración inicial
@@ -41,12 +52,14 @@ st.markdown(f"<style>{_STYLES}</style>", unsafe_allow_html=True)
 # ---------------------------------------------------------------------
 CSV_PATH = os.path.join("Data", "dataset.csv") #creamos la ruta del archivo de forma segura
 GEOJSON_PATH = os.path.join("Data", "departamentos_peru.geojson")
+# Modo multi-proceso: si se define RESIDUOS_SHARED_DIR, el dataset y sus agregados se
+# publican como archivos Arrow en ese directorio y todos los procesos los comparten.
+SHARED_DIR = os.environ.get("RESIDUOS_SHARED_DIR")
 
 # ---------------------------------------------------------------------
 # CARGA DE DATOS (una sola vez)
 # ---------------------------------------------------------------------
-@st.cache_data  #guarda en cache el resultado de esta función para recalcularla cada vez que se actualice la página
-def load_data(csv_path=CSV_PATH): #toma como parametro la ruta del archivo
+def leer_dataset(csv_path=CSV_PATH): #toma como parametro la ruta del archivo
     df = pd.read_csv(csv_path, sep=";", encoding="utf-8-sig") # lee el archivo, con su delimitador y asegura que se lea los caracteres especiales.
     # Normalizar columnas y valores
     df.columns = df.columns.str.strip().str.upper() 
@@ -61,7 +74,244 @@ def load_data(csv_path=CSV_PATH): #toma como parametro la ruta del archivo
     # int64 : valores enteros convertibles
     # float64: NaN o valores no convertibles
 
-df = load_data()
+@st.cache_data  #guarda en cache el resultado de esta función para recalcularla cada vez que se actualice la página
+def load_data(csv_path=CSV_PATH):
+    return leer_dataset(csv_path)
+
+# ---------------------------------------------------------------------
+# DATASET COMPARTIDO ENTRE PROCESOS (Arrow + memory-map)
+# ---------------------------------------------------------------------
+# Cada versión del CSV se publica en SHARED_DIR/<version>/ como archivos Arrow IPC.
+# El primer proceso que ve una versión nueva la construye en un directorio temporal
+# y lo renombra (operación atómica); los demás abren los archivos con memory-map,
+# de modo que el sistema operativo comparte las mismas páginas entre todos los workers.
+
+# Subir este número cuando cambie lo que se publica (leer_dataset o
+# construir_tablas_compartidas), para no adjuntar archivos de un formato anterior.
+FORMATO_COMPARTIDO = 1
+
+def _version_dataset(csv_path):
+    """
+    Identificador de la versión de los datos: formato publicado, fecha de
+    modificación y tamaño del CSV.
+    """
+    info = os.stat(csv_path)
+    return f"v{FORMATO_COMPARTIDO}-{info.st_mtime_ns:x}-{info.st_size:x}"
+
+@contextmanager
+def _bloqueo_publicacion(shared_dir):
+    """
+    Evita que varios procesos construyan la misma versión a la vez. Sin fcntl
+    (Windows) no se bloquea: la publicación sigue siendo atómica, solo puede
+    repetirse el trabajo.
+    """
+    if fcntl is None:
+        yield
+        return
+    with open(os.path.join(shared_dir, ".lock"), "w") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+def construir_tablas_compartidas(csv_path=CSV_PATH):
+    """
+    Tablas que se publican para todos los procesos: el dataset normalizado y el
+    agregado por departamento y periodo que usa el mapa.
+    """
+    df_local = leer_dataset(csv_path)
+    columnas_residuos = [c for c in df_local.columns if c.startswith("QRESIDUOS_")]
+    agregado = df_local.groupby(["DEPARTAMENTO", "PERIODO"], as_index=False)[columnas_residuos].sum()
+    return {
+        "dataset": df_local,
+        "agregado_depto_periodo": agregado
+    }
+
+def _fecha_modificacion(ruta):
+    try:
+        return os.path.getmtime(ruta)
+    except FileNotFoundError:  # otro proceso la borró mientras ordenábamos
+        return 0.0
+
+def _limpiar_versiones_antiguas(shared_dir, conservar=2):
+    """
+    Borra las versiones publicadas más antiguas y, si hay bloqueo entre procesos,
+    los directorios temporales que dejaron publicaciones fallidas. Debe llamarse
+    dentro de _bloqueo_publicacion. En POSIX los procesos que aún tengan mapeada
+    una versión borrada siguen leyéndola hasta que la liberan.
+    """
+    versiones = []
+    for nombre in os.listdir(shared_dir):
+        ruta = os.path.join(shared_dir, nombre)
+        if not os.path.isdir(ruta):
+            continue
+        if nombre.startswith("."):
+            # Sin fcntl otro proceso podría estar construyendo en ese temporal
+            if fcntl is not None:
+                shutil.rmtree(ruta, ignore_errors=True)
+        else:
+            versiones.append(ruta)
+    versiones.sort(key=_fecha_modificacion, reverse=True)
+    for ruta in versiones[conservar:]:
+        shutil.rmtree(ruta, ignore_errors=True)
+
+def publicar_dataset_compartido(csv_path=CSV_PATH, shared_dir=SHARED_DIR):
+    """
+    Publica la versión actual del CSV en shared_dir (si aún no existe) y devuelve
+    su identificador.
+    """
+    version = _version_dataset(csv_path)
+    destino = os.path.join(shared_dir, version)
+    if os.path.isdir(destino):
+        return version
+
+    os.makedirs(shared_dir, exist_ok=True)
+    with _bloqueo_publicacion(shared_dir):
+        if os.path.isdir(destino):  # otro proceso la publicó mientras esperábamos
+            return version
+
+        temporal = tempfile.mkdtemp(prefix=f".{version}-", dir=shared_dir)
+        try:
+            os.chmod(temporal, 0o755)  # mkdtemp crea la carpeta solo para el usuario actual
+            for nombre, tabla in construir_tablas_compartidas(csv_path).items():
+                tabla_arrow = pa.Table.from_pandas(tabla, preserve_index=False)
+                with pa.OSFile(os.path.join(temporal, f"{nombre}.arrow"), "wb") as sink:
+                    with pa.ipc.new_file(sink, tabla_arrow.schema) as writer:
+                        writer.write_table(tabla_arrow)
+            os.rename(temporal, destino)  # atómico: la versión aparece completa o no aparece
+        except OSError:
+            if not os.path.isdir(destino):
+                raise
+        finally:
+            # Tras un rename correcto ya no existe; si algo falló no debe quedar ocupando espacio
+            shutil.rmtree(temporal, ignore_errors=True)
+
+        _limpiar_versiones_antiguas(shared_dir)
+    return version
+
+@st.cache_resource(max_entries=2)  # un solo mapeo por proceso y versión, compartido entre sesiones
+def adjuntar_dataset_compartido(shared_dir, version):
+    """
+    Abre (solo lectura, sin copiar) las tablas Arrow de una versión publicada.
+    """
+    tablas = {}
+    carpeta = os.path.join(shared_dir, version)
+    for archivo in sorted(os.listdir(carpeta)):
+        if archivo.endswith(".arrow"):
+            with pa.memory_map(os.path.join(carpeta, archivo), "r") as fuente:
+                tabla_arrow = pa.ipc.open_file(fuente).read_all()
+            # split_blocks: las columnas numéricas quedan como vistas del archivo mapeado
+            tablas[archivo[:-len(".arrow")]] = tabla_arrow.to_pandas(split_blocks=True)
+    return tablas
+
+def obtener_tablas_compartidas(csv_path=CSV_PATH, shared_dir=SHARED_DIR):
+    """
+    Devuelve (version, tablas) de la versión actual del CSV, publicándola
+    primero si ningún proceso lo ha hecho todavía.
+    """
+    version = publicar_dataset_compartido(csv_path, shared_dir)
+    return version, adjuntar_dataset_compartido(shared_dir, version)
+
+# version_datos identifica al df cargado; sirve de clave barata para las cachés derivadas
+if SHARED_DIR:
+    version_datos, tablas_compartidas = obtener_tablas_compartidas()
+    df = tablas_compartidas["dataset"]
+else:
+    version_datos = _version_dataset(CSV_PATH)
+    tablas_compartidas = None
+    df = load_data()
+
+# ---------------------------------------------------------------------
+# FILTROS GLOBALES (índices bitmap)
+# ---------------------------------------------------------------------
+# Dimensiones filtrables: columna (o dimensión derivada) -> etiqueta en el sidebar
+DIMENSIONES_FILTRO = {
+    "PERIODO": "📅 Periodo",
+    "DEPARTAMENTO": "🏛️ Departamento",
+    "REG_NAT": "⛰️ Región natural",
+    "ZONA_POBLACION": "🏘️ Zona (población urbana/rural)"
+}
+
+def _zona_poblacion(df_local):
+    """
+    Clasifica cada distrito según su porcentaje de población urbana.
+    """
+    urbana = df_local["POB_URBANA"].fillna(0).to_numpy(dtype=np.float64)
+    rural = df_local["POB_RURAL"].fillna(0).to_numpy(dtype=np.float64)
+    total = urbana + rural
+    porcentaje_urbano = np.divide(urbana, total, out=np.zeros_like(urbana), where=total > 0)
+    zonas = np.select(
+        [porcentaje_urbano >= 0.7, porcentaje_urbano >= 0.3],
+        ["Urbana (≥70% urbana)", "Mixta (30-70% urbana)"],
+        default="Rural (<30% urbana)"
+    )
+    return pd.Series(zonas, index=df_local.index)
+
+@st.cache_resource(max_entries=2)  # una vez por versión de datos; sin hashear el DataFrame en cada recarga
+def construir_indices_bitmap(_df_local, version_datos):
+    """
+    Precalcula, para cada dimensión de DIMENSIONES_FILTRO, un bitmap empaquetado
+    (np.packbits, 1 bit por fila) por cada valor distinto. version_datos identifica
+    a _df_local en la caché; el resultado se comparte entre sesiones y no se modifica.
+    """
+    columnas = {dim: _df_local[dim] for dim in DIMENSIONES_FILTRO if dim in _df_local.columns}
+    if "POB_URBANA" in _df_local.columns and "POB_RURAL" in _df_local.columns:
+        columnas["ZONA_POBLACION"] = _zona_poblacion(_df_local)
+
+    indices = {}
+    for dim, serie in columnas.items():
+        codigos, valores = pd.factorize(serie, sort=True)  # NaN -> código -1, queda fuera
+        indices[dim] = {valor: np.packbits(codigos == i) for i, valor in enumerate(valores)}
+
+    return {"n_filas": len(_df_local), "indices": indices}
+
+def resolver_filtros(indice_bitmap, filtros):
+    """
+    Combina los bitmaps de los filtros: OR entre los valores de una misma dimensión
+    y AND entre dimensiones. Una dimensión sin valores seleccionados no filtra.
+    Devuelve una máscara booleana con una posición por fila.
+    """
+    n_filas = indice_bitmap["n_filas"]
+    resultado = None
+    for dim, valores in filtros.items():
+        if not valores:
+            continue
+        bitmaps = indice_bitmap["indices"].get(dim, {})
+        union = np.zeros((n_filas + 7) // 8, dtype=np.uint8)
+        for valor in valores:
+            if valor in bitmaps:
+                np.bitwise_or(union, bitmaps[valor], out=union)
+        if resultado is None:
+            resultado = union
+        else:
+            np.bitwise_and(resultado, union, out=resultado)
+
+    if resultado is None:
+        return np.ones(n_filas, dtype=bool)
+    return np.unpackbits(resultado, count=n_filas).astype(bool)
+
+def aplicar_filtros(df_local, mascara):
+    """
+    Devuelve las filas de df_local marcadas en la máscara de resolver_filtros
+    (df_local si están todas).
+    """
+    if mascara.all():
+        return df_local
+    return df_local[mascara]
+
+def mostrar_filtros_globales(indice_bitmap):
+    """
+    Dibuja los filtros cruzados en el sidebar y devuelve {dimensión: [valores]}.
+    """
+    st.sidebar.markdown("### 🔎 Filtros globales")
+    st.sidebar.caption("Se aplican a los KPIs, las gráficas y el mapa.")
+    filtros = {}
+    for dim, etiqueta in DIMENSIONES_FILTRO.items():
+        if dim in indice_bitmap["indices"]:
+            opciones = list(indice_bitmap["indices"][dim].keys())
+            filtros[dim] = st.sidebar.multiselect(etiqueta, opciones, key=f"filtro_{dim}", placeholder="Todos")
+    return filtros
 
 # ---------------------------------------------------------------------
 # KPIs (Indicadores clave) : Resumen instanteno de métricas clave 
@@ -298,10 +548,136 @@ def grafica_distritos_limpios(
     
     return fig
 
+# ---------------------------------------------------------------------
+# Similitud de composición (índice de vecinos más cercanos)
+# ---------------------------------------------------------------------
+def _normalizar_filas(matriz):
+    """
+    Divide cada fila por su norma euclidiana (las filas en cero se quedan en cero).
+    """
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    return np.divide(matriz, normas, out=np.zeros_like(matriz), where=normas > 0)
 
-def mostrar_graficas(df_local):
+@st.cache_resource(max_entries=2)  # un único índice por versión de datos, compartido entre sesiones
+def construir_indice_similitud(_df_local, version_datos):
+    """
+    Precalcula el índice de similitud entre distritos-periodo de todo el dataset.
+
+    La composición de cada fila (participación de cada QRESIDUOS_* sobre
+    QRESIDUOS_DOM) se estandariza por columna respecto al promedio nacional y se
+    normaliza a norma 1: así se compara en qué se aparta cada perfil del promedio
+    y no la base común de residuos de alimentos. GPC_DOM (escalado a [0, 1]) y
+    REG_NAT (código de región) se guardan aparte para aplicar sus pesos al consultar.
+    """
+    columnas_residuos = [c for c in _df_local.columns if c.startswith("QRESIDUOS_") and c != "QRESIDUOS_DOM"]
+    cantidades = _df_local[columnas_residuos].fillna(0).to_numpy(dtype=np.float64)
+    total = _df_local["QRESIDUOS_DOM"].fillna(0).to_numpy(dtype=np.float64)
+    con_total = total > 0
+    composicion = np.divide(cantidades, total[:, None], out=np.zeros_like(cantidades), where=con_total[:, None])
+
+    # Estandarizar con las filas que tienen total; las demás quedan en cero (sin perfil)
+    if con_total.any():
+        media = composicion[con_total].mean(axis=0)
+        desviacion = composicion[con_total].std(axis=0)
+        composicion = np.divide(composicion - media, desviacion, out=np.zeros_like(composicion), where=desviacion > 0)
+        composicion[~con_total] = 0.0
+    # float32 contiguo: la mitad de memoria y productos más rápidos
+    composicion = np.ascontiguousarray(_normalizar_filas(composicion), dtype=np.float32)
+
+    gpc = np.zeros(len(_df_local))
+    if "GPC_DOM" in _df_local.columns:
+        gpc = _df_local["GPC_DOM"].fillna(0).to_numpy(dtype=np.float64)
+        gpc_max = gpc.max() if gpc.size else 0.0
+        if gpc_max > 0:
+            gpc = gpc / gpc_max
+
+    region = np.full(len(_df_local), -1)
+    if "REG_NAT" in _df_local.columns:
+        region, _ = pd.factorize(_df_local["REG_NAT"].str.upper().str.strip())  # NaN -> -1, sin región
+
+    columnas_claves = [c for c in ["UBIGEO", "DEPARTAMENTO", "PROVINCIA", "DISTRITO", "PERIODO", "REG_NAT", "GPC_DOM", "QRESIDUOS_DOM"] if c in _df_local.columns]
+    claves = _df_local[columnas_claves].reset_index(drop=True)
+
+    return {
+        "composicion": composicion,
+        "norma2_composicion": np.einsum("ij,ij->i", composicion, composicion, dtype=np.float64),  # 1, o 0 sin perfil
+        "gpc": gpc,
+        "region": region,
+        "claves": claves,
+        "columnas_residuos": columnas_residuos
+    }
+
+def buscar_distritos_similares(indice, posicion, k=10, mismo_periodo=True, peso_gpc=0.0, peso_region=0.0, mascara=None):
+    """
+    Devuelve los k distritos-periodo más parecidos a la fila `posicion` del índice,
+    ordenados de mayor a menor similitud (columna SIMILITUD, entre -1 y 1).
+
+    Equivale a la similitud coseno entre vectores [composición, peso_gpc * GPC,
+    peso_region * one-hot(REG_NAT)], calculada sin construir esos vectores:
+    (c·c' + peso_gpc² g·g' + peso_region² [misma región]) / (n · n').
+    `mascara` (una posición por fila del índice) limita los candidatos, por ejemplo
+    a los que cumplen los filtros globales.
+    """
+    composicion = indice["composicion"]
+    gpc = indice["gpc"]
+    region = indice["region"]
+    claves = indice["claves"]
+    peso_gpc2 = peso_gpc ** 2
+    peso_region2 = peso_region ** 2
+
+    con_region = region >= 0
+    misma_region = con_region & (region == region[posicion])
+    producto = composicion @ composicion[posicion] + peso_gpc2 * gpc * gpc[posicion] + peso_region2 * misma_region
+    normas = np.sqrt(indice["norma2_composicion"] + peso_gpc2 * gpc ** 2 + peso_region2 * con_region)
+    divisor = normas * normas[posicion]
+    similitudes = np.divide(producto, divisor, out=np.zeros(len(claves)), where=divisor > 0)
+
+    # Excluir el propio distrito (en cualquier periodo) y, si se pide, otros años
+    candidatos = np.ones(len(claves), dtype=bool) if mascara is None else np.array(mascara, dtype=bool)
+    if "UBIGEO" in claves.columns:
+        ubigeos = claves["UBIGEO"].to_numpy()
+        candidatos &= ubigeos != ubigeos[posicion]
+    candidatos[posicion] = False
+    if mismo_periodo:
+        periodos = claves["PERIODO"].to_numpy()
+        candidatos &= periodos == periodos[posicion]
+
+    k = min(k, int(candidatos.sum()))
+    if k <= 0:
+        return claves.iloc[[]].assign(SIMILITUD=pd.Series(dtype=float))
+
+    similitudes = np.where(candidatos, similitudes, -np.inf)
+    # argpartition: selección O(n) de los k mejores, luego se ordenan solo esos k
+    top = np.argpartition(-similitudes, k - 1)[:k]
+    top = top[np.argsort(-similitudes[top])]
+
+    resultado = claves.iloc[top].copy()
+    resultado["SIMILITUD"] = similitudes[top]
+    return resultado.reset_index(drop=True)
+
+def grafica_distritos_similares(df_similares, distrito, periodo):
+    df_plot = df_similares.copy()
+    # La provincia evita juntar distritos homónimos del mismo departamento en una sola barra
+    periodo_txt = df_plot["PERIODO"].map(lambda p: f"{p:.0f}" if pd.notna(p) else "s/p")
+    df_plot["ETIQUETA"] = df_plot["DISTRITO"] + " (" + df_plot["PROVINCIA"] + ", " + df_plot["DEPARTAMENTO"] + ", " + periodo_txt + ")"
+
+    fig = px.bar(
+        df_plot,
+        x="SIMILITUD",
+        y="ETIQUETA",
+        orientation='h',
+        title=f"Distritos con composición de residuos similar a {distrito} ({periodo})",
+        labels={"ETIQUETA": "Distrito", "SIMILITUD": "Similitud (coseno)"},
+        color="SIMILITUD",
+        color_continuous_scale="Blues"
+    )
+    fig.update_layout(height=500, showlegend=False, yaxis={"categoryorder": "total ascending"})
+    return fig
+
+
+def mostrar_graficas(df_local, indice_similitud, mascara=None):
     st.subheader("📊 Gráficas Interactivas")
-    tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Por Departamento", "📅 Evolución Temporal", "🏆 Top Departamentos", "🔍 Tipos de Residuo", "🌟 Distritos Más Limpios"])
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(["📊 Por Departamento", "📅 Evolución Temporal", "🏆 Top Departamentos", "🔍 Tipos de Residuo", "🌟 Distritos Más Limpios", "🧭 Distritos Similares"])
 
     with tab1:
         st.markdown("### Cantidad Total de Residuos por Departamento")
@@ -447,6 +823,57 @@ def mostrar_graficas(df_local):
             lo que hizo fue traer consigo más residuos que buscan, en su mayoria, contaminar las ciudades.
             """)
 
+    with tab6:
+        st.markdown("### 🧭 Distritos con Perfil de Residuos Similar")
+
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            departamentos = sorted(df_local["DEPARTAMENTO"].unique().tolist())
+            dep_sel = st.selectbox("🏛️ Selecciona el departamento", departamentos, key="g6_dep")
+        with col2:
+            prov_df = df_local[df_local["DEPARTAMENTO"] == dep_sel]
+            provincias = sorted(prov_df["PROVINCIA"].unique().tolist())
+            prov_sel = st.selectbox("🏙️ Selecciona la provincia", provincias, key="g6_prov")
+        with col3:
+            dist_df = prov_df[prov_df["PROVINCIA"] == prov_sel]
+            distritos = sorted(dist_df["DISTRITO"].unique().tolist())
+            dist_sel = st.selectbox("🏘️ Selecciona el distrito", distritos, key="g6_dist")
+        with col4:
+            periodos = sorted(dist_df[dist_df["DISTRITO"] == dist_sel]["PERIODO"].unique())
+            periodo_sel = st.selectbox("📅 Selecciona el año", periodos, index=len(periodos)-1 if periodos else 0, key="g6_periodo")
+
+        col5, col6, col7 = st.columns(3)
+        with col5:
+            top_n = st.slider("¿Cuántos distritos similares mostrar?", min_value=5, max_value=30, value=10, key="g6_top")
+        with col6:
+            peso_gpc = st.slider("⚖️ Peso de la GPC", min_value=0.0, max_value=1.0, value=0.0, step=0.1, key="g6_gpc", help="Cuánto influye la generación per cápita en la similitud")
+        with col7:
+            peso_region = st.slider("⚖️ Peso de la región natural", min_value=0.0, max_value=1.0, value=0.0, step=0.1, key="g6_region", help="Cuánto influye pertenecer a la misma región (Costa, Sierra, Selva)")
+        mismo_periodo = st.checkbox("📅 Comparar solo con distritos del mismo año", value=True, key="g6_mismo")
+
+        # El índice cubre todo el dataset; los filtros globales llegan como máscara de candidatos
+        claves = indice_similitud["claves"]
+        posiciones = np.flatnonzero(
+            (claves["DEPARTAMENTO"] == dep_sel).to_numpy() &
+            (claves["PROVINCIA"] == prov_sel).to_numpy() &
+            (claves["DISTRITO"] == dist_sel).to_numpy() &
+            (claves["PERIODO"] == periodo_sel).to_numpy()
+        )
+
+        if len(posiciones) == 0:
+            st.warning("No hay datos para el distrito y año seleccionados.")
+        else:
+            df_similares = buscar_distritos_similares(
+                indice_similitud, int(posiciones[0]), k=top_n, mismo_periodo=mismo_periodo,
+                peso_gpc=peso_gpc, peso_region=peso_region, mascara=mascara
+            )
+            if df_similares.empty:
+                st.warning("No se encontraron distritos para comparar.")
+            else:
+                st.plotly_chart(grafica_distritos_similares(df_similares, dist_sel, periodo_sel), use_container_width=True)
+                st.dataframe(df_similares, use_container_width=True, hide_index=True)
+        st.info("📌 La similitud compara en qué se aparta la proporción de cada tipo de residuo (respecto al total domiciliario) del promedio nacional: 1 = mismo perfil, 0 = sin relación, negativo = perfiles opuestos. Los pesos permiten considerar también la GPC y la región natural.")
+
 # ---------------------------------------------------------------------
 # Informacion (unificado)
 # ---------------------------------------------------------------------
@@ -465,6 +892,7 @@ def mostrar_descripcion_proyecto():
     - **Mapa Interactivo**: Visualización geoespacial por departamento y periodo.
     - **Gráficas Analíticas**: Tendencias, comparaciones y distribución de residuos.
     - **Filtros dinámicos**: Permiten explorar los datos desde diferentes perspectivas.
+    - **Distritos Similares**: Encuentra distritos con una composición de residuos parecida.
 
     #### 📊 Fuente de datos:
 
@@ -478,6 +906,7 @@ def mostrar_descripcion_proyecto():
     2. En **Inicio**, encontrarás KPIs globales y el mapa interactivo.
     3. En **Gráficas**, podrás explorar análisis visuales detallados por variable.
     4. Ajusta los filtros de periodo para estudiar cómo cambian los residuos con el tiempo.
+    5. Usa los **Filtros globales** del menú lateral para cruzar periodo, departamento, región natural y zona urbana/rural en todo el dashboard.
 
     #### 🛠️ Tecnologías utilizadas:
 
@@ -562,19 +991,25 @@ def mostrar_informacion_completa(df_local):
 # ---------------------------------------------------------------------
 # Map loader 
 # ---------------------------------------------------------------------
-def generar_mapa(df_local, periodo, geojson_path=GEOJSON_PATH):
+def generar_mapa(df_local, periodo, geojson_path=GEOJSON_PATH, df_agrupado=None):
     """
     Genera un mapa folium a partir del dataframe ya cargado y el geojson.
+    Si se pasa df_agrupado (totales por DEPARTAMENTO y PERIODO ya calculados),
+    se usa directamente en lugar de agrupar df_local.
     """
-    # normalizar nombres y columnas (por si)
-    df_copy = df_local.copy()
-    df_copy.columns = df_copy.columns.str.strip().str.upper()
-    if "DEPARTAMENTO" in df_copy.columns:
-        df_copy["DEPARTAMENTO"] = df_copy["DEPARTAMENTO"].astype(str).str.upper().str.strip()
-    columnas_residuos = [c for c in df_copy.columns if c.startswith("QRESIDUOS_") and c != "QRESIDUOS_DOM"]
-
-    # Agrupar por departamento y periodo
-    df_grouped = df_copy.groupby(["DEPARTAMENTO", "PERIODO"], as_index=False)[["QRESIDUOS_DOM"] + columnas_residuos].sum()
+    if df_agrupado is None:
+        # normalizar nombres y columnas (por si)
+        df_copy = df_local.copy()
+        df_copy.columns = df_copy.columns.str.strip().str.upper()
+        if "DEPARTAMENTO" in df_copy.columns:
+            df_copy["DEPARTAMENTO"] = df_copy["DEPARTAMENTO"].astype(str).str.upper().str.strip()
+        columnas_residuos = [c for c in df_copy.columns if c.startswith("QRESIDUOS_") and c != "QRESIDUOS_DOM"]
+
+        # Agrupar por departamento y periodo
+        df_grouped = df_copy.groupby(["DEPARTAMENTO", "PERIODO"], as_index=False)[["QRESIDUOS_DOM"] + columnas_residuos].sum()
+    else:
+        columnas_residuos = [c for c in df_agrupado.columns if c.startswith("QRESIDUOS_") and c != "QRESIDUOS_DOM"]
+        df_grouped = df_agrupado
 
     # Filtrar por periodo
     df_periodo = df_grouped[df_grouped["PERIODO"] == periodo].copy()
@@ -666,6 +1101,12 @@ st.sidebar.markdown("---")
 
 pagina = st.sidebar.radio("Selecciona una sección:", ["🏠 Inicio", "📈 Gráficas", "ℹ️ Información"], index=0)
 
+st.sidebar.markdown("---")
+indice_bitmap = construir_indices_bitmap(df, version_datos)
+filtros = mostrar_filtros_globales(indice_bitmap)
+mascara_filtros = resolver_filtros(indice_bitmap, filtros)
+df_filtrado = aplicar_filtros(df, mascara_filtros)
+
 st.sidebar.markdown("---")
 st.sidebar.markdown("### Acerca del proyecto")
 st.sidebar.info(
@@ -677,21 +1118,27 @@ st.sidebar.info(
 # Rutas y comprobaciones básicas
 if df.empty:
     st.error("El dataset está vacío o no pudo cargarse. Revisa Data/dataset.csv")
+elif df_filtrado.empty and pagina != "ℹ️ Información":
+    st.warning("Ningún registro cumple los filtros globales seleccionados. Ajusta los filtros del menú lateral.")
 else:
     if pagina == "🏠 Inicio":
         st.title("📊 SISTEMA DE ANÁLISIS DE RESIDUOS SÓLIDOS DOMICILIARIOS")
         st.markdown("---")
 
         # KPIs
-        mostrar_kpis(df)
+        mostrar_kpis(df_filtrado)
         st.markdown("---")
 
         # Mapa
         st.subheader("🗺️ Mapa de Residuos por Departamento")
-        periodos = sorted(df["PERIODO"].unique())
+        periodos = sorted(df_filtrado["PERIODO"].unique())
         periodo_seleccionado = st.selectbox("Selecciona el periodo (año):", periodos, index=len(periodos)-1 if periodos else 0)
+        # Con el dataset compartido y sin filtros, el agregado ya publicado evita reagrupar
+        df_agrupado = None
+        if tablas_compartidas is not None and df_filtrado is df:
+            df_agrupado = tablas_compartidas["agregado_depto_periodo"]
         with st.spinner("Cargando mapa..."):
-            mapa = generar_mapa(df, periodo_seleccionado, geojson_path=GEOJSON_PATH)
+            mapa = generar_mapa(df_filtrado, periodo_seleccionado, geojson_path=GEOJSON_PATH, df_agrupado=df_agrupado)
             # Mostrar mapa 
             try:
                 st.components.v1.html(mapa._repr_html_(), height=650)
@@ -703,7 +1150,7 @@ else:
     elif pagina == "📈 Gráficas":
         st.title("📈 Análisis Gráfico de Residuos")
         st.markdown("---")
-        mostrar_graficas(df)
+        mostrar_graficas(df_filtrado, construir_indice_similitud(df, version_datos), mascara=mascara_filtros)
 
     elif pagina == "ℹ️ Información":
         st.title("ℹ️ Información del Proyecto")